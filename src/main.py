@@ -12,6 +12,7 @@ import asyncio
 from pathlib import Path
 from typing import Optional
 
+import qasync
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 
@@ -25,12 +26,13 @@ from utils.logging_config import setup_logging
 class Application:
     """Main application class that handles initialization and cleanup."""
 
-    def __init__(self):
-        self.app: Optional[QApplication] = None
+    def __init__(self, app: QApplication):
+        self.app = app
         self.window: Optional[MainWindow] = None
         self.file_service: Optional[FileSystemService] = None
         self.ai_service: Optional[AIService] = None
         self.config: Optional[Config] = None
+        self.shutdown_requested = asyncio.Event()
 
     async def initialize(self) -> None:
         """Initialize application components."""
@@ -49,9 +51,10 @@ class Application:
             self.ai_service = AIService(api_key=os.getenv('ANTHROPIC_API_KEY'))
             await self.ai_service.initialize()
 
-            # Create Qt application
-            self.app = QApplication(sys.argv)
+            # Configure Qt application; quitting is driven by main() so the
+            # shared asyncio loop can finish cleanup first
             self.app.setApplicationName("AI-Powered File Explorer")
+            self.app.setQuitOnLastWindowClosed(False)
 
             # Create and show main window
             self.window = MainWindow(
@@ -59,6 +62,7 @@ class Application:
                 ai_service=self.ai_service,
                 config=self.config
             )
+            self.window.closed.connect(self.shutdown_requested.set)
             self.window.show()
 
             logging.info("Application initialized successfully")
@@ -77,30 +81,32 @@ class Application:
         if self.ai_service:
             await self.ai_service.cleanup()
 
-    def run(self) -> int:
-        """Run the application main loop."""
-        return self.app.exec() if self.app else 1
-
-async def main() -> int:
+async def main(qt_app: QApplication) -> int:
     """Main entry point for the application."""
-    app = Application()
+    app = Application(qt_app)
     try:
         await app.initialize()
-        result = app.run()
-        await app.cleanup()
-        return result
+        await app.shutdown_requested.wait()
+        return 0
     except Exception as e:
         logging.critical(f"Application failed: {e}")
         return 1
+    finally:
+        await app.cleanup()
 
 if __name__ == "__main__":
     # Set Qt platform properties
     os.environ["QT_AUTO_SCREEN_SCALE_FACTOR"] = "1"
     QApplication.setAttribute(Qt.ApplicationAttribute.AA_EnableHighDpiScaling)
 
-    # Run the application
+    # Run Qt and asyncio on a single shared event loop
+    qt_app = QApplication(sys.argv)
+    loop = qasync.QEventLoop(qt_app)
+    asyncio.set_event_loop(loop)
+
     try:
-        exit_code = asyncio.run(main())
+        with loop:
+            exit_code = loop.run_until_complete(main(qt_app))
         sys.exit(exit_code)
     except KeyboardInterrupt:
         logging.info("Application terminated by user")
@@ -5,16 +5,25 @@ This module manages AI interactions, context tracking, and command processing.
 
 import logging
 import asyncio
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Union
+from dataclasses import dataclass, replace
 from datetime import datetime
 from pathlib import Path
 
-from anthropic import AsyncAnthropic, APIError, APITimeoutError, RateLimitError
+import httpx
+from anthropic import (
+    AsyncAnthropic,
+    APIError,
+    APITimeoutError,
+    AuthenticationError,
+    RateLimitError
+)
 from PyQt6.QtCore import QObject, pyqtSignal
 
 
-@dataclass
+@dataclass(slots=True)
 class AIContext:
     """Container for AI conversation context."""
     workspace_path: Optional[Path]
@@ -40,6 +49,32 @@ class AIEventEmitter(QObject):
     error_occurred = pyqtSignal(str)
 
 
+BASE_SYSTEM_PROMPT = "You are an AI assistant helping with file management."
+
+# Prompts longer than this (roughly 1024 tokens) are marked for prompt caching
+PROMPT_CACHE_MIN_CHARS = 4096
+
+
+@lru_cache(maxsize=8)
+def _render_context_prompt(
+    workspace_path: Optional[Path],
+    selected_files: str
+) -> str:
+    """Render the stable, cacheable part of the system prompt.
+
+    selected_files is the newline-joined selection precomputed by
+    AIService.update_context.
+    """
+    files_section = (
+        f"\n\nSelected files:\n{selected_files}" if selected_files else ""
+    )
+    return (
+        f"{BASE_SYSTEM_PROMPT}\n\n"
+        f"Current workspace: {workspace_path}"
+        f"{files_section}"
+    )
+
+
 class AIService:
     """Service for handling AI operations and context management."""
 
@@ -47,55 +82,83 @@ class AIService:
         if not api_key:
             raise ValueError("API key is required")
 
-        self.client = AsyncAnthropic(api_key=api_key)
+        self._api_key = api_key
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.client: Optional[AsyncAnthropic] = None
         self.model = model
         self.event_emitter = AIEventEmitter()
         self.context: Optional[AIContext] = None
+        self._selected_files_str = ""
         self.rate_limiter = AsyncRateLimiter(requests_per_minute=50)
         self._is_initialized = False
 
     async def initialize(self) -> None:
-        """Initialize the AI service and verify API connection."""
+        """Initialize the AI service.
+
+        The API key is not verified here; authentication failures surface
+        through error_occurred on the first processed command.
+        """
         if self._is_initialized:
             return
 
-        try:
-            # Test API connection
-            await self.client.messages.create(
-                model=self.model,
-                max_tokens=10,
-                messages=[{"role": "user", "content": "Test connection"}]
-            )
-            self._is_initialized = True
-            logging.info("AIService initialized successfully")
-        except Exception as e:
-            logging.error(f"Failed to initialize AIService: {e}")
-            raise
+        # Shared transport so repeated commands reuse warm connections;
+        # built here so re-initializing after cleanup gets a fresh pool
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=256,
+                max_keepalive_connections=64
+            ),
+            http2=True,
+            timeout=httpx.Timeout(connect=5.0, read=120.0, write=30.0, pool=5.0)
+        )
+        self.client = AsyncAnthropic(
+            api_key=self._api_key,
+            http_client=self._http_client,
+            max_retries=2
+        )
+        self._is_initialized = True
+        logging.info("AIService initialized successfully")
 
     async def cleanup(self) -> None:
         """Clean up resources and clear context."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        self.client = None
         self.context = None
+        self._selected_files_str = ""
         self._is_initialized = False
 
-    async def update_context(
+    def update_context(
         self,
         workspace_path: Optional[Path] = None,
         selected_files: Optional[List[Path]] = None
     ) -> None:
-        """Update the current AI context.
+        """Update the current AI context in place.
 
         Args:
             workspace_path: Current workspace directory
             selected_files: Currently selected files
         """
-        self.context = AIContext(
-            workspace_path=workspace_path,
-            selected_files=selected_files or [],
-            last_command=self.context.last_command if self.context else None,
-            last_response=self.context.last_response if self.context else None,
-            timestamp=datetime.now()
+        # Joined once per selection change rather than once per command
+        self._selected_files_str = "\n".join(
+            os.fspath(f) for f in selected_files or []
         )
 
+        if self.context is None:
+            self.context = AIContext(
+                workspace_path=workspace_path,
+                selected_files=selected_files or [],
+                last_command=None,
+                last_response=None,
+                timestamp=datetime.now()
+            )
+            return
+
+        self.context.workspace_path = workspace_path
+        self.context.selected_files = selected_files or []
+        self.context.timestamp = datetime.now()
+
     async def process_command(self, command: str) -> AIResponse:
         """Process an AI command with current context.
 
@@ -121,7 +184,6 @@ class AIService:
 
             # Prepare messages
             messages = [
-                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": command}
             ]
 
@@ -132,16 +194,37 @@ class AIService:
             response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=4000,
+                system=system_prompt,
                 messages=messages,
                 stream=True
             )
 
             # Process response stream
             full_response = []
-            async for chunk in response:
-                if chunk.content:
-                    full_response.append(chunk.content)
-                    self.event_emitter.response_chunk.emit(chunk.content)
+            input_tokens = 0
+            cache_creation_tokens = 0
+            cache_read_tokens = 0
+            output_tokens = 0
+            async for event in response:
+                if (
+                    event.type == "content_block_delta"
+                    and event.delta.type == "text_delta"
+                ):
+                    piece = event.delta.text
+                    full_response.append(piece)
+                    self.event_emitter.response_chunk.emit(piece)
+                elif event.type == "message_start":
+                    usage = event.message.usage
+                    input_tokens = usage.input_tokens
+                    # Cached prompt tokens are reported separately
+                    cache_creation_tokens = getattr(
+                        usage, "cache_creation_input_tokens", 0
+                    ) or 0
+                    cache_read_tokens = getattr(
+                        usage, "cache_read_input_tokens", 0
+                    ) or 0
+                elif event.type == "message_delta":
+                    output_tokens = event.usage.output_tokens
 
             # Combine response chunks
             complete_response = "".join(full_response)
@@ -155,12 +238,20 @@ class AIService:
             # Create response object
             ai_response = AIResponse(
                 content=complete_response,
-                context=self.context.copy() if self.context else None,
+                context=replace(self.context) if self.context else None,
                 metadata={
                     "model": self.model,
                     "timestamp": datetime.now(),
-                    # Approximate
-                    "tokens_used": len(complete_response.split())
+                    "input_tokens": input_tokens,
+                    "cache_creation_input_tokens": cache_creation_tokens,
+                    "cache_read_input_tokens": cache_read_tokens,
+                    "output_tokens": output_tokens,
+                    "tokens_used": (
+                        input_tokens
+                        + cache_creation_tokens
+                        + cache_read_tokens
+                        + output_tokens
+                    )
                 }
             )
 
@@ -178,6 +269,11 @@ class AIService:
             self.event_emitter.error_occurred.emit(error_msg)
             raise
 
+        except AuthenticationError:
+            error_msg = "AI authentication failed; check ANTHROPIC_API_KEY"
+            self.event_emitter.error_occurred.emit(error_msg)
+            raise
+
         except APIError as e:
             error_msg = f"AI API error: {e}"
             self.event_emitter.error_occurred.emit(error_msg)
@@ -188,47 +284,70 @@ class AIService:
             self.event_emitter.error_occurred.emit(error_msg)
             raise
 
-    def _build_system_prompt(self) -> str:
-        """Build the system prompt using current context."""
-        if not self.context:
-            return "You are an AI assistant helping with file management."
-
-        prompt_parts = [
-            "You are an AI assistant helping with file management.",
-            f"Current workspace: {self.context.workspace_path}",
-        ]
-
-        if self.context.selected_files:
-            files_str = "\n".join(str(f) for f in self.context.selected_files)
-            prompt_parts.append(f"Selected files:\n{files_str}")
+    def _build_system_prompt(self) -> Union[str, List[Dict[str, Any]]]:
+        """Build the system prompt using current context.
 
-        if self.context.last_command:
-            prompt_parts.append(f"Last command: {self.context.last_command}")
+        Large prompts are split into two text blocks: the workspace and
+        selection carry an ephemeral cache breakpoint, and the last
+        command follows it so changing commands don't invalidate the cache.
+        """
+        if not self.context:
+            return BASE_SYSTEM_PROMPT
 
-        return "\n\n".join(prompt_parts)
+        prompt = _render_context_prompt(
+            self.context.workspace_path,
+            self._selected_files_str
+        )
+        last_command = self.context.last_command
+
+        if len(prompt) < PROMPT_CACHE_MIN_CHARS:
+            if last_command:
+                return f"{prompt}\n\nLast command: {last_command}"
+            return prompt
+
+        blocks: List[Dict[str, Any]] = [{
+            "type": "text",
+            "text": prompt,
+            "cache_control": {"type": "ephemeral"}
+        }]
+        if last_command:
+            blocks.append({
+                "type": "text",
+                "text": f"Last command: {last_command}"
+            })
+        return blocks
 
 
 class AsyncRateLimiter:
-    """Rate limiter for API requests."""
+    """Token-bucket rate limiter for API requests."""
 
     def __init__(self, requests_per_minute: int):
         self.rate_limit = requests_per_minute
-        self.tokens = requests_per_minute
-        self.last_update = datetime.now()
+        self._rate = requests_per_minute / 60.0  # tokens per second
+        self._tokens = float(requests_per_minute)
+        self._last: Optional[float] = None
         self._lock = asyncio.Lock()
 
     async def acquire(self) -> None:
-        """Acquire a rate limit token."""
+        """Acquire a rate limit token, sleeping until it is due.
+
+        The token is reserved immediately, letting the balance go negative,
+        so each caller sleeps exactly once and callers are served in
+        arrival order.
+        """
+        loop = asyncio.get_running_loop()
         async with self._lock:
-            while self.tokens <= 0:
-                now = datetime.now()
-                time_passed = (now - self.last_update).total_seconds() / 60.0
-                self.tokens = min(
-                    self.rate_limit,
-                    self.tokens + time_passed * self.rate_limit
+            now = loop.time()
+            if self._last is not None:
+                self._tokens = min(
+                    float(self.rate_limit),
+                    self._tokens + (now - self._last) * self._rate
                 )
-                if self.tokens <= 0:
-                    await asyncio.sleep(0.1)
-                self.last_update = now
+            self._last = now
+
+            self._tokens -= 1
+            wait = max(0.0, -self._tokens / self._rate)
 
-            self.tokens -= 1
+        # Sleep outside the lock so later callers can reserve their slot
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -4,78 +4,102 @@ This module provides asynchronous file operations and real-time file system moni
 """
 
 import asyncio
+import codecs
+import io
 import logging
+import mimetypes
+import os
+import stat
+from collections import OrderedDict, deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Set, Optional, AsyncGenerator
+from typing import Deque, Dict, List, Optional, AsyncGenerator
 from datetime import datetime
 import aiofiles
 import magic
 from watchdog.observers import Observer
+from watchdog.observers.api import ObservedWatch
 from watchdog.events import (
     FileSystemEventHandler,
     FileCreatedEvent,
     FileModifiedEvent,
     FileDeletedEvent
 )
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 
 
 class FileSystemEventEmitter(QObject):
-    """Qt signal emitter for file system events."""
-    file_created = pyqtSignal(Path)
-    file_modified = pyqtSignal(Path)
-    file_deleted = pyqtSignal(Path)
+    """Qt signal emitter for file system events.
+
+    File events are delivered in batches of path strings, flushed
+    periodically from the Qt thread.
+    """
+    file_created_batch = pyqtSignal(list)
+    file_modified_batch = pyqtSignal(list)
+    file_deleted_batch = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
 
 
 class FileSystemHandler(FileSystemEventHandler):
-    """Watchdog event handler for file system changes."""
+    """Watchdog event handler for file system changes.
 
-    def __init__(self, emitter: FileSystemEventEmitter):
+    Runs on the observer thread and only queues raw paths; the owning
+    service drains the queues on the Qt thread.
+    """
+
+    def __init__(self):
         super().__init__()
-        self.emitter = emitter
+        self.pending_created: Deque[str] = deque()
+        self.pending_modified: Deque[str] = deque()
+        self.pending_deleted: Deque[str] = deque()
 
     def on_created(self, event: FileCreatedEvent) -> None:
         if not event.is_directory:
-            self.emitter.file_created.emit(Path(event.src_path))
+            self.pending_created.append(event.src_path)
 
     def on_modified(self, event: FileModifiedEvent) -> None:
         if not event.is_directory:
-            self.emitter.file_modified.emit(Path(event.src_path))
+            self.pending_modified.append(event.src_path)
 
     def on_deleted(self, event: FileDeletedEvent) -> None:
         if not event.is_directory:
-            self.emitter.file_deleted.emit(Path(event.src_path))
+            self.pending_deleted.append(event.src_path)
 
 
+@dataclass(slots=True, frozen=True)
 class FileMetadata:
     """Container for file metadata."""
+    path: Path
+    size: int
+    mtime_ns: int
+    mime_type: str
+    is_hidden: bool = False
 
-    def __init__(
-        self,
-        path: Path,
-        size: int,
-        modified_time: datetime,
-        mime_type: str,
-        is_hidden: bool = False
-    ):
-        self.path = path
-        self.size = size
-        self.modified_time = modified_time
-        self.mime_type = mime_type
-        self.is_hidden = is_hidden
+    @property
+    def modified_time(self) -> datetime:
+        """Last modification time as a local datetime."""
+        return datetime.fromtimestamp(self.mtime_ns / 1e9)
 
 
 class FileSystemService:
     """Service for handling file system operations and monitoring."""
 
-    def __init__(self, chunk_size: int = 1024 * 1024):  # 1MB chunks
+    def __init__(
+        self,
+        chunk_size: int = 4 * 1024 * 1024,  # 4MB chunks
+        metadata_cache_size: int = 8192
+    ):
         self.chunk_size = chunk_size
+        self.metadata_cache_size = metadata_cache_size
         self.observer = Observer()
         self.event_emitter = FileSystemEventEmitter()
-        self.event_handler = FileSystemHandler(self.event_emitter)
-        self.monitored_paths: Set[Path] = set()
-        self.metadata_cache: Dict[Path, FileMetadata] = {}
+        self.event_handler = FileSystemHandler()
+        self._flush_timer: Optional[QTimer] = None
+        self._watches: Dict[Path, ObservedWatch] = {}
+        # LRU keyed by os.fspath(path); entries are revalidated against mtime
+        self.metadata_cache: "OrderedDict[str, FileMetadata]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future[Optional[FileMetadata]]"] = {}
+        self._magic: Optional[magic.Magic] = None
         self._is_initialized = False
 
     async def initialize(self) -> None:
@@ -84,6 +108,16 @@ class FileSystemService:
             return
 
         try:
+            # One libmagic handle for the service lifetime; loading the
+            # database is the expensive part of MIME detection
+            self._magic = magic.Magic(mime=True)
+
+            # Forwards queued watchdog events to Qt once per frame; only
+            # runs while at least one directory is being monitored
+            self._flush_timer = QTimer()
+            self._flush_timer.setInterval(16)
+            self._flush_timer.timeout.connect(self._flush_events)
+
             self.observer.start()
             self._is_initialized = True
             logging.info("FileSystemService initialized successfully")
@@ -96,10 +130,27 @@ class FileSystemService:
         if self.observer.is_alive():
             self.observer.stop()
             self.observer.join()
-        self.monitored_paths.clear()
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+            self._flush_timer = None
+            self._flush_events()
+        self._watches.clear()
         self.metadata_cache.clear()
         self._is_initialized = False
 
+    def _flush_events(self) -> None:
+        """Emit all queued file system events as batches."""
+        handler = self.event_handler
+        for pending, signal in (
+            (handler.pending_created, self.event_emitter.file_created_batch),
+            (handler.pending_modified, self.event_emitter.file_modified_batch),
+            (handler.pending_deleted, self.event_emitter.file_deleted_batch),
+        ):
+            # Only drain what is queued now; the observer may keep appending
+            count = len(pending)
+            if count:
+                signal.emit([pending.popleft() for _ in range(count)])
+
     async def start_monitoring(self, path: Path) -> None:
         """Start monitoring a directory for changes.
 
@@ -110,20 +161,20 @@ class FileSystemService:
             FileNotFoundError: If the path doesn't exist
             PermissionError: If we don't have permission to monitor the path
         """
-        if not path.exists():
-            raise FileNotFoundError(f"Path does not exist: {path}")
-
-        if not path.is_dir():
+        # stat() raises FileNotFoundError itself; no separate exists() check
+        if not stat.S_ISDIR(path.stat().st_mode):
             raise NotADirectoryError(f"Path is not a directory: {path}")
 
         try:
-            if path not in self.monitored_paths:
-                self.observer.schedule(
+            if path not in self._watches:
+                self._watches[path] = self.observer.schedule(
                     self.event_handler,
                     str(path),
                     recursive=True
                 )
-                self.monitored_paths.add(path)
+                timer = self._flush_timer
+                if timer is not None and not timer.isActive():
+                    timer.start()
                 logging.info(f"Started monitoring directory: {path}")
         except Exception as e:
             self.event_emitter.error_occurred.emit(str(e))
@@ -131,11 +182,12 @@ class FileSystemService:
 
     async def stop_monitoring(self, path: Path) -> None:
         """Stop monitoring a specific directory."""
-        if path in self.monitored_paths:
-            for watch in self.observer.watches.copy():
-                if Path(watch) == path:
-                    self.observer.unschedule(self.observer.watches[watch])
-            self.monitored_paths.remove(path)
+        watch = self._watches.pop(path, None)
+        if watch is not None:
+            self.observer.unschedule(watch)
+            if not self._watches and self._flush_timer is not None:
+                self._flush_timer.stop()
+                self._flush_events()
             logging.info(f"Stopped monitoring directory: {path}")
 
     async def get_metadata(self, path: Path) -> FileMetadata:
@@ -150,32 +202,74 @@ class FileSystemService:
         Raises:
             FileNotFoundError: If the file doesn't exist
         """
-        if path in self.metadata_cache:
-            return self.metadata_cache[path]
-
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {path}")
-
+        key = os.fspath(path)
         stats = path.stat()
-        mime_type = magic.from_file(str(path), mime=True)
-        is_hidden = path.name.startswith('.')
 
-        metadata = FileMetadata(
-            path=path,
-            size=stats.st_size,
-            modified_time=datetime.fromtimestamp(stats.st_mtime),
-            mime_type=mime_type,
-            is_hidden=is_hidden
-        )
+        cached = self.metadata_cache.get(key)
+        if cached is not None and cached.mtime_ns == stats.st_mtime_ns:
+            self.metadata_cache.move_to_end(key)
+            return cached
+
+        # Concurrent misses for the same path share a single lookup
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            metadata = await asyncio.shield(inflight)
+            if metadata is None:
+                # The owning lookup was cancelled; retry it ourselves
+                return await self.get_metadata(path)
+            return metadata
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            mime_type = await self._detect_mime_type(path)
+            is_hidden = path.name.startswith('.')
+
+            metadata = FileMetadata(
+                path=path,
+                size=stats.st_size,
+                mtime_ns=stats.st_mtime_ns,
+                mime_type=mime_type,
+                is_hidden=is_hidden
+            )
+
+            self.metadata_cache[key] = metadata
+            self.metadata_cache.move_to_end(key)
+            if len(self.metadata_cache) > self.metadata_cache_size:
+                self.metadata_cache.popitem(last=False)
+
+            future.set_result(metadata)
+            return metadata
+        except Exception as e:
+            future.set_exception(e)
+            # Mark as retrieved; waiters re-raise it themselves
+            future.exception()
+            raise
+        finally:
+            # Cancelled owner: wake waiters with None so they retry rather
+            # than inheriting a cancellation that wasn't theirs
+            if not future.done():
+                future.set_result(None)
+            del self._inflight[key]
+
+    async def _detect_mime_type(self, path: Path) -> str:
+        """Detect a file's MIME type on a worker thread."""
+        if self._magic is None:
+            self._magic = magic.Magic(mime=True)
 
-        self.metadata_cache[path] = metadata
-        return metadata
+        return await asyncio.to_thread(self._magic.from_file, str(path))
 
-    async def read_file(self, path: Path) -> str:
+    async def read_file(self, path: Path, max_bytes: Optional[int] = None) -> str:
         """Read a file's contents asynchronously.
 
+        The file is read once in binary chunks and decoded incrementally as
+        UTF-8, replacing invalid byte sequences. Newlines are translated as in
+        text mode. A multi-byte character cut off by max_bytes is dropped
+        rather than replaced.
+
         Args:
             path: Path to the file to read
+            max_bytes: Stop after reading this many bytes (e.g. for previews)
 
         Returns:
             File contents as a string
@@ -184,16 +278,28 @@ class FileSystemService:
             FileNotFoundError: If the file doesn't exist
             PermissionError: If we don't have permission to read the file
         """
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {path}")
+        utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        decoder = io.IncrementalNewlineDecoder(utf8, translate=True)
+        parts = []
+        remaining = max_bytes
 
-        try:
-            async with aiofiles.open(path, 'r') as f:
-                return await f.read()
-        except UnicodeDecodeError:
-            # If text reading fails, try binary mode
-            async with aiofiles.open(path, 'rb') as f:
-                return (await f.read()).decode('utf-8', errors='ignore')
+        async with aiofiles.open(path, 'rb') as f:
+            while remaining is None or remaining > 0:
+                size = self.chunk_size
+                if remaining is not None:
+                    size = min(size, remaining)
+                chunk = await f.read(size)
+                if not chunk:
+                    break
+                parts.append(decoder.decode(chunk))
+                if remaining is not None:
+                    remaining -= len(chunk)
+
+        if remaining is not None and remaining <= 0:
+            # Truncated by max_bytes: discard any partial character
+            utf8.reset()
+        parts.append(decoder.decode(b'', final=True))
+        return ''.join(parts)
 
     async def read_binary(self, path: Path) -> AsyncGenerator[bytes, None]:
         """Read a binary file in chunks asynchronously.
@@ -204,12 +310,44 @@ class FileSystemService:
         Yields:
             File contents in chunks
         """
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {path}")
-
-        async with aiofiles.open(path, 'rb') as f:
-            while chunk := await f.read(self.chunk_size):
+        # Plain fd reads on a worker thread: one thread hop per chunk.
+        # open and fadvise are cheap, so they run inline and can't leak the
+        # fd if we're cancelled between them.
+        flags = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+        fd = os.open(os.fspath(path), flags)
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                # Advisory only; pipes and FIFOs reject it with ESPIPE
+                pass
+
+        pending: Optional["asyncio.Future[bytes]"] = None
+        try:
+            while True:
+                pending = asyncio.ensure_future(
+                    asyncio.to_thread(os.read, fd, self.chunk_size)
+                )
+                # Shielded so cancellation never abandons a read mid-flight
+                chunk = await asyncio.shield(pending)
+                if not chunk:
+                    break
                 yield chunk
+        finally:
+            if pending is not None and not pending.done():
+                # A worker still owns the fd; close it once the read ends so
+                # the descriptor number can't be reused underneath it
+                pending.add_done_callback(lambda f: self._close_fd(fd, f))
+            else:
+                os.close(fd)
+
+    @staticmethod
+    def _close_fd(fd: int, read: "asyncio.Future[bytes]") -> None:
+        """Close a file descriptor after an abandoned read completes."""
+        if not read.cancelled():
+            # Retrieve any error so it isn't reported as unhandled
+            read.exception()
+        os.close(fd)
 
     async def write_file(
         self,
@@ -232,7 +370,7 @@ class FileSystemService:
             await f.flush()
 
         # Clear metadata cache for this file
-        self.metadata_cache.pop(path, None)
+        self.metadata_cache.pop(os.fspath(path), None)
 
     async def delete_file(self, path: Path) -> None:
         """Delete a file.
@@ -244,12 +382,11 @@ class FileSystemService:
             FileNotFoundError: If the file doesn't exist
             PermissionError: If we don't have permission to delete the file
         """
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {path}")
-
         try:
             path.unlink()
-            self.metadata_cache.pop(path, None)
+            self.metadata_cache.pop(os.fspath(path), None)
+        except FileNotFoundError:
+            raise
         except Exception as e:
             self.event_emitter.error_occurred.emit(str(e))
             raise
@@ -268,25 +405,57 @@ class FileSystemService:
         Yields:
             FileMetadata objects for each item in the directory
         """
-        if not path.exists():
-            raise FileNotFoundError(f"Directory not found: {path}")
-
-        if not path.is_dir():
-            raise NotADirectoryError(f"Path is not a directory: {path}")
-
         try:
-            for item in path.iterdir():
-                try:
-                    metadata = await self.get_metadata(item)
-                    if include_hidden or not metadata.is_hidden:
-                        yield metadata
-                except (PermissionError, FileNotFoundError) as e:
-                    logging.warning(f"Error accessing {item}: {e}")
-                    continue
+            entries = await asyncio.to_thread(
+                self._scan_directory, path, include_hidden
+            )
+            for metadata in entries:
+                yield metadata
+        except (FileNotFoundError, NotADirectoryError):
+            raise
         except Exception as e:
             self.event_emitter.error_occurred.emit(str(e))
             raise
 
+    @staticmethod
+    def _scan_directory(path: Path, include_hidden: bool) -> List[FileMetadata]:
+        """Collect metadata for a directory's entries in a single scandir pass.
+
+        Runs on a worker thread. MIME types are guessed from the file name
+        here; content sniffing is left to get_metadata so listing a large
+        directory never opens its files.
+        """
+        results = []
+        with os.scandir(path) as it:
+            for entry in it:
+                is_hidden = entry.name.startswith('.')
+                if is_hidden and not include_hidden:
+                    continue
+
+                try:
+                    stats = entry.stat()
+                    is_dir = entry.is_dir()
+                except OSError as e:
+                    logging.warning(f"Error accessing {entry.path}: {e}")
+                    continue
+
+                if is_dir:
+                    mime_type = 'inode/directory'
+                else:
+                    mime_type = (
+                        mimetypes.guess_type(entry.name)[0]
+                        or 'application/octet-stream'
+                    )
+
+                results.append(FileMetadata(
+                    path=Path(entry.path),
+                    size=stats.st_size,
+                    mtime_ns=stats.st_mtime_ns,
+                    mime_type=mime_type,
+                    is_hidden=is_hidden
+                ))
+        return results
+
     def clear_metadata_cache(self) -> None:
         """Clear the metadata cache."""
         self.metadata_cache.clear()
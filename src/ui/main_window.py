@@ -18,7 +18,7 @@ from PyQt6.QtWidgets import (
     QMenu,
     QStatusBar
 )
-from PyQt6.QtCore import Qt, pyqtSlot, QSettings
+from PyQt6.QtCore import Qt, pyqtSignal, pyqtSlot, QSettings
 
 from .file_explorer_panel import FileExplorerPanel
 from .preview_panel import PreviewPanel
@@ -31,6 +31,9 @@ from utils.config import Config
 class MainWindow(QMainWindow):
     """Main application window."""
 
+    # Emitted once the window has been closed
+    closed = pyqtSignal()
+
     def __init__(
         self,
         file_service: FileSystemService,
@@ -248,4 +251,5 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event) -> None:
         """Handle window close event."""
         self.save_state()
-        super().closeEvent(event)
\ No newline at end of file
+        super().closeEvent(event)
+        self.closed.emit()
\ No newline at end of file